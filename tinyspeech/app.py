@@ -3,168 +3,56 @@
 
 import gradio as gr
 import os
-import tempfile
-import shutil
-from pipeline import process_audio
+import threading
+from pipeline import iter_process_audio, load_whisper_model, WHISPER_NUM_WORKERS
 import traceback
 
+# Custom CSS for beautiful styling, read once when the app starts
+with open(os.path.join(os.path.dirname(__file__), 'static', 'style.css'), 'r', encoding='utf-8') as f:
+    CUSTOM_CSS = f.read()
+
 def process_audio_file(audio_file):
     """
-    Process uploaded audio file and return the generated report
+    Process uploaded audio file, yielding (output_path, status, preview) as work progresses
     """
     if audio_file is None:
-        return None, "❌ Please upload an audio file first.", ""
+        yield None, "❌ Please upload an audio file first.", ""
+        return
     
     try:
-        # Create a temporary file with the uploaded audio
-        temp_dir = tempfile.mkdtemp()
-        temp_audio_path = os.path.join(temp_dir, "uploaded_audio" + os.path.splitext(audio_file.name)[1])
-        
-        # Copy uploaded file to temp location
-        shutil.copy2(audio_file.name, temp_audio_path)
+        # Gradio has already saved the upload (with its original extension),
+        # so the pipeline reads it in place instead of from a second copy
+        audio_path = audio_file if isinstance(audio_file, str) else audio_file.name
         
-        # Process the audio using our pipeline
-        output_path = process_audio(temp_audio_path)
+        # Process the audio using our pipeline, previewing the transcript and
+        # then the summary as they grow
+        output_path, report_content = None, None
+        for stage, value in iter_process_audio(audio_path):
+            if stage == 'transcript':
+                yield None, "🔄 Transcribing... partial transcript below.", value
+            elif stage == 'summary':
+                yield None, "🤖 Generating summary...", value
+            elif stage == 'done':
+                output_path, report_content = value
         
-        if output_path and os.path.exists(output_path):
-            # Read the generated report
-            with open(output_path, 'r', encoding='utf-8') as f:
-                report_content = f.read()
-            
-            # Clean up temp files
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
+        if output_path:
+            # The report on disk is only for download; preview the same text
             success_msg = "✅ Processing complete! Report generated successfully."
-            return output_path, success_msg, report_content
+            yield output_path, success_msg, report_content
         else:
-            return None, "❌ Processing failed. Please check your audio file and try again.", ""
+            yield None, "❌ Processing failed. Please check your audio file and try again.", ""
             
     except Exception as e:
         error_msg = f"❌ Error processing audio: {str(e)}"
         print(f"Error details: {traceback.format_exc()}")
-        return None, error_msg, ""
+        yield None, error_msg, ""
 
 def create_interface():
     """
     Create and configure the Gradio interface
     """
     
-    # Custom CSS for beautiful styling
-    custom_css = """
-    /* Header styling */
-    .header {
-        text-align: center;
-        padding: 1rem;
-        background: linear-gradient(135deg, #4e54c8 0%, #8f94fb 100%);
-        color: white;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-    
-    /* Feature box styling */
-    .feature-box {
-        background: #ffffff;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-        border: 1px solid #d0d7de;
-        color: #24292f;
-    }
-    
-    /* Feature box headings */
-    .feature-box h3 {
-        color: #0969da;
-        margin-top: 0;
-        font-weight: 600;
-    }
-    
-    /* Feature box lists */
-    .feature-box ol, .feature-box ul {
-        color: #24292f;
-        padding-left: 1.5rem;
-    }
-    
-    .feature-box li {
-        margin-bottom: 0.5rem;
-        line-height: 1.5;
-        color: #24292f;
-    }
-    
-    .feature-box ol li {
-        color: #24292f;
-        font-weight: 500;
-    }
-    
-    .feature-box ol li strong {
-        color: #0969da;
-    }
-    
-    /* Status messages */
-    .status-box {
-        padding: 1rem;
-        border-radius: 5px;
-        border-left: 4px solid #4e54c8;
-        margin: 1rem 0;
-        background: #f5f7ff;
-        color: #24292f;
-    }
-    .status-success {
-        color: #155724;
-        background-color: #d4edda;
-        font-weight: bold;
-    }
-    .status-error {
-        color: #721c24;
-        background-color: #f8d7da;
-        font-weight: bold;
-    }
-    
-    /* Body background */
-    body {
-        background: linear-gradient(135deg, #f5f7fa 0%, #e4edf9 100%);
-        color: #24292f;
-        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-    }
-    
-    /* Button styling */
-    button {
-        background: linear-gradient(135deg, #4e54c8 0%, #8f94fb 100%) !important;
-        border: none !important;
-        color: white !important;
-        font-weight: bold !important;
-        padding: 12px 24px !important;
-        border-radius: 6px !important;
-        font-size: 16px !important;
-    }
-    
-    /* Input styling */
-    input, textarea, select {
-        background-color: #ffffff !important;
-        color: #24292f !important;
-        border: 1px solid #d0d7de !important;
-        border-radius: 6px !important;
-        padding: 8px 12px !important;
-    }
-    
-    /* Gradio container */
-    .gradio-container {
-        max-width: 1200px !important;
-        margin: auto !important;
-        background: rgba(255, 255, 255, 0.8) !important;
-        backdrop-filter: blur(10px) !important;
-        border-radius: 12px !important;
-        box-shadow: 0 8px 24px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    /* Strong text */
-    strong {
-        color: #24292f;
-    }
-    """
-    
-    with gr.Blocks(css=custom_css, title="TinySpeech Summarizer", theme=gr.themes.Soft()) as interface:
+    with gr.Blocks(css=CUSTOM_CSS, title="TinySpeech Summarizer", theme=gr.themes.Soft()) as interface:
         
         # Header
         gr.HTML("""
@@ -258,18 +146,20 @@ def create_interface():
             # Show processing message
             yield None, "🔄 Processing your audio... This may take a few minutes.", "", gr.update(visible=False)
             
-            # Process the file
-            output_path, status, report = process_audio_file(audio_file)
-            
-            if output_path:
-                yield output_path, status, report, gr.update(visible=True, value=output_path)
-            else:
-                yield None, status, report, gr.update(visible=False)
+            # Process the file, streaming progress to the UI
+            for output_path, status, report in process_audio_file(audio_file):
+                if output_path:
+                    yield output_path, status, report, gr.update(visible=True, value=output_path)
+                else:
+                    yield None, status, report, gr.update(visible=False)
         
+        # Run as many uploads at once as there are Whisper workers (one by
+        # default; see TINYSPEECH_WHISPER_WORKERS in pipeline.py)
         process_btn.click(
             fn=handle_process,
             inputs=[audio_input],
-            outputs=[download_file, status_msg, report_preview, download_file]
+            outputs=[download_file, status_msg, report_preview, download_file],
+            concurrency_limit=WHISPER_NUM_WORKERS
         )
         
         # Example files section
@@ -301,6 +191,10 @@ def main():
     print("   📝 Beautiful Markdown reports")
     print("\n🚀 Ready to process your audio files!")
     
+    # Warm the Whisper model while the server starts so the first upload
+    # doesn't pay the load time; requests that arrive earlier wait on the same load
+    threading.Thread(target=load_whisper_model, daemon=True).start()
+    
     interface = create_interface()
     
     # Launch with public sharing disabled by default for privacy
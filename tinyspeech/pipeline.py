@@ -2,102 +2,507 @@
 # This file contains all functions for transcription, summarization, and file output
 
 import os
-import whisper
-import google.generativeai as genai
-from pydub import AudioSegment
+import atexit
+import functools
+import hashlib
+import io
+import json
+import pickle
+import tempfile
+import re
+from collections import Counter
+import threading
+import time
+import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+# faster_whisper and google.generativeai are slow to import (CTranslate2,
+# gRPC and protobuf setup), so they are imported on first use rather than
+# when the app starts
+
+WHISPER_MODEL_NAME = "tiny.en"
+# Precision per device: int8 GEMMs on CPU and FP16 on CUDA both move about
+# half the bytes of FP32, which is what Whisper tiny is bound by
+WHISPER_COMPUTE_TYPES = {'cpu': 'int8', 'cuda': 'float16'}
+# Number of transcriptions that can run at the same time on one loaded model,
+# e.g. for concurrent uploads in the web UI. The CPU cores are split between
+# them, so the default of 1 gives a single user every core; shared servers can
+# raise it with TINYSPEECH_WHISPER_WORKERS in the environment or .env file.
+WHISPER_NUM_WORKERS = max(1, int(os.getenv('TINYSPEECH_WHISPER_WORKERS', '1')))
+
+# Loaded Whisper models, keyed by (model source, device), so the weights are
+# read from disk once per process instead of once per audio file
+_loaded_models = {}
+_models_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def _whisper_device():
+    """Return 'cuda' if CTranslate2 can see a GPU, otherwise 'cpu'"""
+    import ctranslate2
+    return 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
 
 def load_whisper_model():
-    """Load the Whisper tiny.en model for transcription"""
-    print("Loading Whisper model...")
+    """Load the Whisper tiny.en model for transcription (cached after first load)"""
+    # Use local model if available, otherwise download.
+    # The local model is a CTranslate2 conversion, see the README.
+    local_model_path = os.path.join(os.path.dirname(__file__), 'models', WHISPER_MODEL_NAME)
+    model_source = local_model_path if os.path.isdir(local_model_path) else WHISPER_MODEL_NAME
+    device = _whisper_device()
+    key = (model_source, device)
     
-    # Use local model if available, otherwise download
-    local_model_path = os.path.join(os.path.dirname(__file__), 'models', 'tiny.en.pt')
+    model = _loaded_models.get(key)
+    if model is not None:
+        return model
     
-    if os.path.exists(local_model_path):
-        print(f"Using local model: {local_model_path}")
-        model = whisper.load_model(local_model_path)
-    else:
-        print("Local model not found, downloading...")
-        model = whisper.load_model("tiny.en")
+    with _models_lock:
+        # Another request may have finished loading while we waited
+        model = _loaded_models.get(key)
+        if model is not None:
+            return model
+        
+        from faster_whisper import WhisperModel
+        
+        print("Loading Whisper model...")
+        if model_source == local_model_path:
+            print(f"Using local model: {local_model_path}")
+        else:
+            print("Local model not found, downloading...")
+        # The model stays resident on the selected device between requests
+        model = WhisperModel(
+            model_source,
+            device=device,
+            compute_type=WHISPER_COMPUTE_TYPES[device],
+            # Split the cores between workers so concurrent transcriptions
+            # don't run more compute threads than there are cores
+            cpu_threads=max(1, (os.cpu_count() or 1) // WHISPER_NUM_WORKERS),
+            num_workers=WHISPER_NUM_WORKERS
+        )
+        _loaded_models[key] = model
     
-    print("✓ Whisper model loaded successfully")
+    print(f"✓ Whisper model loaded successfully ({device}, {WHISPER_COMPUTE_TYPES[device]})")
     return model
 
-def transcribe_audio(audio_path, model):
-    """Transcribe audio file using Whisper"""
+# Transcription and summary cache settings
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'tinyspeech')
+CACHE_TTL_DAYS = 30
+CACHE_MAX_MB = 200
+CACHE_SUFFIXES = ('.pkl', '.json')
+
+# Options passed to Whisper; they are part of the cache key so changing them
+# never serves a transcript produced with different settings.
+# The Silero VAD filter drops silent stretches before they reach the encoder;
+# faster-whisper maps segment timestamps back onto the original timeline.
+# Only segment timestamps are used downstream; word timestamps need an extra
+# alignment pass, so they are off unless something starts consuming them.
+WORD_TIMESTAMPS = False
+TRANSCRIBE_OPTIONS = {
+    'word_timestamps': WORD_TIMESTAMPS,
+    'vad_filter': True,
+    'vad_parameters': {'min_silence_duration_ms': 500},
+}
+
+# Uploads up to this size are read into memory once and shared by the cache
+# hash and the decoder, instead of being read from disk twice
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+def _read_audio(audio_path):
+    """Return small audio files as an in-memory file, larger ones as their path"""
+    if os.path.getsize(audio_path) > SPOOL_MAX_BYTES:
+        return audio_path
+    with open(audio_path, 'rb') as f:
+        return io.BytesIO(f.read())
+
+# Whisper works on 16 kHz mono float32 samples
+SAMPLE_RATE = 16000
+
+def decode_audio(audio):
+    """Decode audio (a path or an in-memory file) to 16 kHz mono float32 samples"""
+    import soundfile as sf
+    
+    # libsndfile decodes WAV/FLAC/OGG directly, without setting up an
+    # FFmpeg demuxer and resampler; use it when the audio is already 16 kHz
+    try:
+        sample_rate = sf.info(audio).samplerate
+    except RuntimeError:  # not a format libsndfile can read
+        sample_rate = None
+    finally:
+        if isinstance(audio, io.BytesIO):
+            audio.seek(0)
+    
+    if sample_rate == SAMPLE_RATE:
+        samples, _ = sf.read(audio, dtype='float32', always_2d=True)
+        return samples.mean(axis=1, dtype=np.float32)
+    
+    # Everything else goes through faster-whisper's in-process FFmpeg decoder
+    from faster_whisper import decode_audio as ffmpeg_decode_audio
+    return ffmpeg_decode_audio(audio, sampling_rate=SAMPLE_RATE)
+
+def _audio_key(audio):
+    """Hash the audio contents (a path or an in-memory file) for use as a cache key"""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(audio, io.BytesIO):
+        with audio.getbuffer() as view:
+            digest.update(view)
+        return digest.hexdigest()
+    
+    with open(audio, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_path(audio_key):
+    """Return the cache file path for an audio hash and the current settings"""
+    options = repr(sorted(TRANSCRIBE_OPTIONS.items())).encode('utf-8')
+    options_key = hashlib.blake2b(options, digest_size=4).hexdigest()
+    return os.path.join(CACHE_DIR, f"{audio_key}_{WHISPER_MODEL_NAME}_{options_key}.pkl")
+
+def load_cached_transcription(audio_key):
+    """Return a cached (transcript, segments) pair, or None on a cache miss"""
+    cache_path = _cache_path(audio_key)
+    try:
+        with open(cache_path, 'rb') as f:
+            transcript, segments = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable cache entry {cache_path}: {e}")
+        return None
+    
+    # Refresh the modification time so eviction is least-recently-used
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass  # removed by a concurrent prune; the data is already loaded
+    return transcript, segments
+
+def _write_cache_file(cache_path, mode, dump):
+    """Write a cache entry via a uniquely named temp file, so readers and concurrent writers never see a partial entry"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            dump(f)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def save_cached_transcription(audio_key, transcript, segments):
+    """Store a transcription result in the on-disk cache"""
+    try:
+        _write_cache_file(
+            _cache_path(audio_key), 'wb',
+            lambda f: pickle.dump((transcript, segments), f, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+    except OSError as e:
+        print(f"Could not write transcription cache: {e}")
+        return
+    
+    prune_cache()
+
+def prune_cache(ttl_days=CACHE_TTL_DAYS, max_mb=CACHE_MAX_MB):
+    """Remove expired cache entries, then the least recently used ones over the size limit"""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.is_file() and entry.name.endswith(CACHE_SUFFIXES):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed by a concurrent prune
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    expiry = time.time() - ttl_days * 24 * 60 * 60
+    total_size = sum(size for _, size, _ in entries)
+    max_size = max_mb * 1024 * 1024
+    
+    # Oldest first, so expired and least recently used entries go first
+    for mtime, size, path in sorted(entries):
+        if mtime >= expiry and total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError:
+            pass
+
+def clear_cache():
+    """Delete every cached transcription and summary"""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for entry in os.scandir(CACHE_DIR):
+        if entry.is_file() and entry.name.endswith(CACHE_SUFFIXES):
+            os.remove(entry.path)
+    print(f"✓ Cleared cache: {CACHE_DIR}")
+
+# The cache is pruned after every write; also prune on exit so a session
+# that only read from the cache still drops expired entries
+atexit.register(prune_cache)
+
+# Minimum time between partial transcript updates while transcribing
+PARTIAL_UPDATE_SECONDS = 1.0
+
+def stream_transcription(audio_path, model, use_cache=True):
+    """Transcribe audio file using Whisper, yielding (transcript, segments) as segments are decoded"""
     print(f"Transcribing audio: {os.path.basename(audio_path)}")
     
-    # Transcribe with timestamps
-    result = model.transcribe(audio_path, word_timestamps=True)
+    audio = _read_audio(audio_path)
+    
+    # Reuse an earlier transcription of the same audio if we have one
+    if use_cache:
+        audio_key = _audio_key(audio)
+        cached = load_cached_transcription(audio_key)
+        if cached is not None:
+            print("✓ Using cached transcription")
+            yield cached
+            return
     
-    # Extract segments with timestamps
+    # Decode once up front; VAD and every transcription window share the samples
+    samples = decode_audio(audio)
+    
+    # faster-whisper transcribes lazily: each segment is produced as soon as its
+    # window is done, so partial transcripts are available while it runs
+    result_segments, _info = model.transcribe(samples, **TRANSCRIBE_OPTIONS)
+    
+    # Extract segments with timestamps. Joining the transcript costs its full
+    # length, so the partial transcript is refreshed at most once per
+    # PARTIAL_UPDATE_SECONDS instead of after every segment.
     segments = []
-    for segment in result['segments']:
+    texts = []
+    last_update = float('-inf')  # show the first segment straight away
+    for segment in result_segments:
+        text = segment.text.strip()
         segments.append({
-            'start': segment['start'],
-            'end': segment['end'],
-            'text': segment['text'].strip()
+            'start': segment.start,
+            'end': segment.end,
+            'text': text
         })
+        texts.append(text)
+        if time.monotonic() - last_update >= PARTIAL_UPDATE_SECONDS:
+            yield " ".join(texts), segments
+            last_update = time.monotonic()
     
-    full_transcript = result['text']
+    full_transcript = " ".join(texts)
     print(f"✓ Transcription complete ({len(segments)} segments)")
     
+    if use_cache:
+        save_cached_transcription(audio_key, full_transcript, segments)
+    
+    yield full_transcript, segments
+
+def transcribe_audio(audio_path, model, use_cache=True):
+    """Transcribe audio file using Whisper"""
+    full_transcript, segments = "", []
+    for full_transcript, segments in stream_transcription(audio_path, model, use_cache=use_cache):
+        pass
     return full_transcript, segments
 
+# Number of segments compared on each side of a candidate chapter boundary
+TOPIC_WINDOW = 6
+# Most frequent words kept for topic detection; bounds the TF-IDF matrix to
+# segments x TOPIC_VOCABULARY_SIZE however long the transcript is
+TOPIC_VOCABULARY_SIZE = 1000
+
+def _tfidf_matrix(segments):
+    """Return a (segments x vocabulary) TF-IDF matrix of the segment texts"""
+    segment_words = [re.findall(r"[a-z0-9']+", segment['text'].lower()) for segment in segments]
+    document_frequency = Counter(word for words in segment_words for word in set(words))
+    
+    # Words in only one segment can't link neighbouring segments, and words in
+    # most segments carry almost no topic information; keep the most frequent
+    # of the rest
+    max_frequency = len(segments) // 2
+    candidates = [word for word, frequency in document_frequency.items() if 2 <= frequency <= max_frequency]
+    candidates.sort(key=lambda word: -document_frequency[word])
+    vocabulary = {word: i for i, word in enumerate(candidates[:TOPIC_VOCABULARY_SIZE])}
+    
+    rows, cols = [], []
+    for i, words in enumerate(segment_words):
+        for word in words:
+            col = vocabulary.get(word)
+            if col is not None:
+                rows.append(i)
+                cols.append(col)
+    
+    counts = np.zeros((len(segments), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(counts, (rows, cols), 1)
+    
+    idf = np.zeros(counts.shape[1], dtype=np.float32)
+    for word, col in vocabulary.items():
+        idf[col] = np.log(len(segments) / document_frequency[word])
+    return counts * idf
+
+def _equal_time_boundaries(segments, max_chapters):
+    """Split into roughly equal time chunks, ending each at the first segment past its boundary"""
+    ends = np.fromiter((segment['end'] for segment in segments), dtype=np.float64, count=len(segments))
+    targets = np.linspace(0, ends[-1], max_chapters + 1)[1:-1]
+    boundaries = np.unique(np.searchsorted(ends, targets, side='left') + 1)
+    return boundaries[boundaries < len(segments)].tolist()
+
+def _depth_scores(similarity):
+    """
+    Score each gap by how far its similarity dips below the nearest peak on each side
+    
+    As in TextTiling, the peaks are found by climbing from the gap while the
+    similarity keeps rising, so a shallow dip scores low even when it sits
+    next to a very similar stretch elsewhere in the transcript.
+    """
+    count = len(similarity)
+    left_peak = similarity.copy()
+    right_peak = similarity.copy()
+    # The climb from a gap continues exactly like the climb from its neighbour
+    # whenever that neighbour is at least as similar
+    for i in range(1, count):
+        if similarity[i - 1] >= similarity[i]:
+            left_peak[i] = left_peak[i - 1]
+    for i in range(count - 2, -1, -1):
+        if similarity[i + 1] >= similarity[i]:
+            right_peak[i] = right_peak[i + 1]
+    return left_peak + right_peak - 2 * similarity
+
+def _topic_boundaries(tfidf, max_chapters):
+    """
+    Find chapter boundaries where the vocabulary shifts (TextTiling)
+    
+    Each gap between segments is scored by how far the similarity of the
+    windows of segments on either side falls below the nearest peaks around
+    it; the deepest, reasonably spaced gaps become boundaries.
+    """
+    count = len(tfidf)
+    
+    # Window sums on each side of every gap, from one cumulative sum
+    cumulative = np.vstack([np.zeros((1, tfidf.shape[1]), dtype=tfidf.dtype), np.cumsum(tfidf, axis=0)])
+    gaps = np.arange(1, count)
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - TOPIC_WINDOW, 0)]
+    right = cumulative[np.minimum(gaps + TOPIC_WINDOW, count)] - cumulative[gaps]
+    
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    similarity = np.einsum('ij,ij->i', left, right) / np.maximum(norms, 1e-9)
+    depth = _depth_scores(similarity)
+    
+    # Take the deepest gaps, keeping chapters at least half the average length
+    min_length = max(1, count // (2 * max_chapters))
+    boundaries = []
+    for gap_index in np.argsort(-depth, kind='stable'):
+        if len(boundaries) == max_chapters - 1 or depth[gap_index] <= 0:
+            break
+        boundary = int(gaps[gap_index])
+        if boundary < min_length or count - boundary < min_length:
+            continue
+        if all(abs(boundary - other) >= min_length for other in boundaries):
+            boundaries.append(boundary)
+    
+    return sorted(boundaries)
+
 def generate_chapters(segments, max_chapters=8):
     """Generate timestamped chapters from transcript segments"""
     if not segments:
         return []
     
-    # Simple chapter generation: divide transcript into roughly equal time chunks
-    total_duration = segments[-1]['end']
-    chapter_duration = total_duration / max_chapters
+    # Start chapters where the topic shifts. Transcripts too short to compare
+    # windows of segments, or without clear topic shifts (e.g. repetitive text
+    # or little shared vocabulary), are split into equal time chunks instead.
+    tfidf = _tfidf_matrix(segments)
+    boundaries = []
+    if len(segments) >= 2 * TOPIC_WINDOW * max_chapters:
+        boundaries = _topic_boundaries(tfidf, max_chapters)
+    if len(boundaries) < (max_chapters - 1) // 2:
+        boundaries = _equal_time_boundaries(segments, max_chapters)
+    bounds = [0] + boundaries + [len(segments)]
     
     chapters = []
     current_chapter_start = 0
-    chapter_text = ""
     
-    for i, segment in enumerate(segments):
-        chapter_text += segment['text'] + " "
+    for first, last in zip(bounds, bounds[1:]):
+        chapter_text = " ".join(segment['text'] for segment in segments[first:last])
         
-        # Check if we should start a new chapter
-        if (segment['end'] >= current_chapter_start + chapter_duration and 
-            len(chapters) < max_chapters - 1) or i == len(segments) - 1:
-            
-            # Generate chapter title from first few words
-            words = chapter_text.strip().split()[:6]
-            title = " ".join(words) + ("..." if len(words) == 6 else "")
-            
-            chapters.append({
-                'start_time': current_chapter_start,
-                'end_time': segment['end'],
-                'title': title,
-                'text': chapter_text.strip()
-            })
-            
-            current_chapter_start = segment['end']
-            chapter_text = ""
+        # Fallback title (Gemini normally provides one): the first few words of
+        # the segment closest to the chapter's overall vocabulary
+        chapter_tfidf = tfidf[first:last]
+        scores = chapter_tfidf @ chapter_tfidf.sum(axis=0)
+        words = segments[first + int(np.argmax(scores))]['text'].split()[:6]
+        title = " ".join(words) + ("..." if len(words) == 6 else "")
+        
+        chapters.append({
+            'start_time': current_chapter_start,
+            'end_time': segments[last - 1]['end'],
+            'title': title,
+            'text': chapter_text
+        })
+        
+        current_chapter_start = segments[last - 1]['end']
     
     return chapters
 
-def generate_summary(transcript):
-    """Generate summary using Gemini API"""
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+@functools.lru_cache(maxsize=1)
+def _configure_gemini():
+    """Import and configure the Gemini API once, on first use"""
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+    return genai
+
+# The single Gemini response ends with this section, listing one title per
+# chapter; everything before it is the Markdown summary shown in the report
+CHAPTER_TITLES_HEADING = "## Chapter Titles"
+_CHAPTER_TITLE_RE = re.compile(r"^\s*\d+[.)]\s*(.+?)\s*$", re.MULTILINE)
+
+def parse_summary_response(response_text):
+    """Split a Gemini response into (summary_markdown, chapter_titles)"""
+    summary, _, titles_section = response_text.partition(CHAPTER_TITLES_HEADING)
+    chapter_titles = _CHAPTER_TITLE_RE.findall(titles_section)
+    return summary.strip() + "\n", chapter_titles
+
+def _partial_summary(response_text):
+    """Return the complete lines of the summary received so far"""
+    # Hold back the unfinished last line, which may be the start of the
+    # chapter titles heading
+    complete_text = response_text[:response_text.rfind("\n") + 1]
+    return complete_text.partition(CHAPTER_TITLES_HEADING)[0].strip()
+
+def _finish_reason(chunk):
+    """Return the finish reason name of a streamed response chunk"""
+    if not chunk.candidates:
+        return 'NO_CANDIDATES'  # the prompt itself was blocked
+    return chunk.candidates[0].finish_reason.name
+
+def stream_summary(transcript, chapters=None, use_cache=True):
+    """
+    Generate summary and chapter titles using Gemini API, streaming the response
+    
+    Yields (summary_markdown, chapter_titles) as text arrives; chapter_titles
+    stays empty until the full response is in, and is also empty if Gemini
+    did not return one title per chapter.
+    """
     print("Generating summary with Gemini...")
     
+    # Send the transcript split into its chapters so the same call can title them
+    if chapters:
+        transcript = "\n\n".join(
+            f"[Chapter {i}, {format_timestamp(chapter['start_time'])} - {format_timestamp(chapter['end_time'])}]\n{chapter['text']}"
+            for i, chapter in enumerate(chapters, 1)
+        )
+    chapter_count = len(chapters) if chapters else 0
+    
+    # Plain Markdown with the summary first, so it can be shown while the rest
+    # of the response is still being generated
     prompt = f"""
 Please analyze this audio transcript and provide:
 
 1. A concise summary (2-3 paragraphs) of the main content
 2. Key points or takeaways (3-5 bullet points)
 3. Main topics discussed
+4. A short, descriptive title for each of the {chapter_count} chapters, in order
 
 Transcript:
 {transcript}
@@ -115,16 +520,83 @@ Please format your response as:
 - [Topic 1]
 - [Topic 2]
 - [Topic 3]
+
+{CHAPTER_TITLES_HEADING}
+1. [Title of chapter 1]
+2. [Title of chapter 2]
+...
 """
     
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        print("✓ Summary generated successfully")
-        return response.text
-    except Exception as e:
-        print(f"Error generating summary: {e}")
-        return "Summary generation failed. Please check your Gemini API key."
+    # Identical prompts get identical answers; skip the API call on re-runs
+    cache_key = hashlib.blake2b(f"{GEMINI_MODEL_NAME}\n{prompt}".encode('utf-8'), digest_size=20).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"summary_{cache_key}.json")
+    result = None
+    if use_cache:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(cache_path)
+            print("✓ Using cached summary")
+        except (OSError, ValueError):
+            result = None
+    
+    if result is None:
+        try:
+            genai = _configure_gemini()
+            model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+            
+            # Show the summary as it is written instead of waiting for the whole
+            # response; only pass on previews with new text, so the UI keeps
+            # showing the transcript until the summary actually starts
+            response_parts = []
+            shown = ""
+            for chunk in model.generate_content(prompt, stream=True):
+                # A stream that ends for any reason other than STOP (SAFETY,
+                # RECITATION, MAX_TOKENS, ...) is cut off; treat it as a failure
+                finish_reason = _finish_reason(chunk)
+                if finish_reason not in ('FINISH_REASON_UNSPECIFIED', 'STOP'):
+                    raise RuntimeError(f"response stopped early ({finish_reason})")
+                try:
+                    response_parts.append(chunk.text)
+                except ValueError:
+                    # A chunk without text is only expected as the final STOP chunk
+                    if finish_reason != 'STOP':
+                        raise
+                    continue
+                partial = _partial_summary("".join(response_parts))
+                if partial and partial != shown:
+                    shown = partial
+                    yield partial, []
+            
+            summary, chapter_titles = parse_summary_response("".join(response_parts))
+            result = {'summary': summary, 'chapter_titles': chapter_titles}
+            print("✓ Summary generated successfully")
+        except Exception as e:
+            print(f"Error generating summary: {e}")
+            yield "Summary generation failed. Please check your Gemini API key.", []
+            return
+        
+        # Only cache complete answers, so a bad response doesn't stick around
+        # for the whole cache lifetime
+        if use_cache and summary.strip() and len(chapter_titles) == chapter_count:
+            try:
+                _write_cache_file(cache_path, 'w', lambda f: json.dump(result, f))
+                prune_cache()
+            except OSError as e:
+                print(f"Could not write summary cache: {e}")
+    
+    chapter_titles = [title.strip() for title in result.get('chapter_titles', [])]
+    if len(chapter_titles) != chapter_count:
+        chapter_titles = []
+    
+    yield result['summary'], chapter_titles
+
+def generate_summary(transcript, chapters=None, use_cache=True):
+    """Generate summary and chapter titles using Gemini API, returns (summary_markdown, chapter_titles)"""
+    summary, chapter_titles = "", []
+    for summary, chapter_titles in stream_summary(transcript, chapters, use_cache=use_cache):
+        pass
+    return summary, chapter_titles
 
 def format_timestamp(seconds):
     """Convert seconds to MM:SS format"""
@@ -132,11 +604,28 @@ def format_timestamp(seconds):
     seconds = int(seconds % 60)
     return f"{minutes:02d}:{seconds:02d}"
 
-def create_markdown_report(transcript, summary, chapters, audio_filename):
+def format_transcript(segments):
+    """Render transcript segments as Markdown with a timestamp at each new minute"""
+    parts = []
+    current_minute = -1
+    for segment in segments:
+        # Add minute markers
+        segment_minute = int(segment['start'] // 60)
+        if segment_minute != current_minute:
+            current_minute = segment_minute
+            parts.append(f"\n**[{format_timestamp(segment['start'])}]** ")
+        
+        parts.append(segment['text'] + " ")
+    
+    return "".join(parts)
+
+def create_markdown_report(summary, chapters, transcript_markdown, audio_filename):
     """Create a formatted Markdown report"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    report = f"""# TinySpeech Report: {audio_filename}
+    # Collect the pieces and join once at the end; repeated += on the report
+    # string copies the whole thing every time
+    parts = [f"""# TinySpeech Report: {audio_filename}
 
 **Generated:** {timestamp}  
 **Source:** {audio_filename}  
@@ -150,57 +639,64 @@ def create_markdown_report(transcript, summary, chapters, audio_filename):
 
 ## 📚 Chapters
 
-"""
+"""]
     
     # Add chapters
     for i, chapter in enumerate(chapters, 1):
         start_time = format_timestamp(chapter['start_time'])
         end_time = format_timestamp(chapter['end_time'])
-        report += f"### {i}. {chapter['title']} ({start_time} - {end_time})\n\n"
-    
-    report += "\n---\n\n## 📝 Full Transcript\n\n"
+        parts.append(f"### {i}. {chapter['title']} ({start_time} - {end_time})\n\n")
     
     # Add full transcript with timestamps
-    current_minute = -1
-    for segment in chapters:
-        # Add minute markers
-        segment_minute = int(segment['start_time'] // 60)
-        if segment_minute != current_minute:
-            current_minute = segment_minute
-            report += f"\n**[{format_timestamp(segment['start_time'])}]** "
-        
-        report += segment['text'] + " "
+    parts.append("\n---\n\n## 📝 Full Transcript\n\n")
+    parts.append(transcript_markdown)
     
-    return report
+    return "".join(parts)
 
-def process_audio(audio_path):
-    """Main pipeline function to process audio file"""
+def iter_process_audio(audio_path, use_cache=True):
+    """
+    Run the pipeline on an audio file, reporting progress as it goes.
+    
+    Yields ('transcript', partial_transcript) while transcribing,
+    ('summary', partial_summary) while the summary is generated, and finally
+    ('done', (output_path, report)), where both are None if processing failed.
+    """
     if not os.path.exists(audio_path):
         print(f"Error: Audio file not found: {audio_path}")
-        return None
+        yield 'done', (None, None)
+        return
     
     print(f"\n🎵 Processing: {os.path.basename(audio_path)}")
     print("=" * 50)
     
     try:
-        # Step 1: Load Whisper model
+        # Step 1: Load Whisper model (reused across calls)
         model = load_whisper_model()
         
-        # Step 2: Transcribe audio
-        transcript, segments = transcribe_audio(audio_path, model)
+        # Step 2: Transcribe audio, passing partial transcripts up as they arrive
+        transcript, segments = "", []
+        for transcript, segments in stream_transcription(audio_path, model, use_cache=use_cache):
+            yield 'transcript', transcript
         
         # Step 3: Generate chapters
         print("Generating chapters...")
         chapters = generate_chapters(segments)
         print(f"✓ Generated {len(chapters)} chapters")
         
-        # Step 4: Generate summary
-        summary = generate_summary(transcript)
+        # Step 4: Generate summary and chapter titles in one Gemini call,
+        # streaming the summary up as it arrives
+        summary, chapter_titles = "", []
+        for summary, chapter_titles in stream_summary(transcript, chapters, use_cache=use_cache):
+            yield 'summary', summary
+        
+        for chapter, title in zip(chapters, chapter_titles):
+            chapter['title'] = title
         
         # Step 5: Create markdown report
         print("Creating markdown report...")
         audio_filename = os.path.basename(audio_path)
-        report = create_markdown_report(transcript, summary, chapters, audio_filename)
+        transcript_markdown = format_transcript(segments)
+        report = create_markdown_report(summary, chapters, transcript_markdown, audio_filename)
         
         # Step 6: Save report
         output_dir = os.path.join(os.path.dirname(__file__), 'outputs')
@@ -217,18 +713,35 @@ def process_audio(audio_path):
         print(f"✓ Report saved: {output_path}")
         print("\n🎉 Processing complete!")
         
-        return output_path
+        yield 'done', (output_path, report)
         
     except Exception as e:
         print(f"\n❌ Error processing audio: {e}")
-        return None
+        yield 'done', (None, None)
+
+def process_audio(audio_path, use_cache=True):
+    """Main pipeline function to process audio file, returns (output_path, report)"""
+    result = (None, None)
+    for stage, value in iter_process_audio(audio_path, use_cache=use_cache):
+        if stage == 'done':
+            result = value
+    return result
 
 if __name__ == "__main__":
     # CLI interface for testing
-    import sys
-    if len(sys.argv) > 1:
-        audio_file = sys.argv[1]
-        process_audio(audio_file)
-    else:
-        print("Usage: python pipeline.py <audio_file_path>")
-        print("\nExample: python pipeline.py /path/to/audio.mp3")
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Transcribe and summarize an audio file",
+        epilog="Example: python pipeline.py /path/to/audio.mp3"
+    )
+    parser.add_argument('audio_file', nargs='?', help="path to the audio file to process")
+    parser.add_argument('--no-cache', action='store_true', help="always re-run transcription and summarization")
+    parser.add_argument('--clear-cache', action='store_true', help="delete cached transcriptions and summaries")
+    args = parser.parse_args()
+    
+    if args.clear_cache:
+        clear_cache()
+    if args.audio_file:
+        process_audio(args.audio_file, use_cache=not args.no_cache)
+    elif not args.clear_cache:
+        parser.print_usage()
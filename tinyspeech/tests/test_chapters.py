@@ -0,0 +1,69 @@
+# TinySpeech Summarizer - Chapter generation tests
+
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pipeline
+
+TOPICS = [
+    ["cat", "dog", "pet", "fur", "vet"],
+    ["stock", "market", "bond", "yield", "price"],
+    ["rocket", "orbit", "launch", "mars", "fuel"],
+    ["bread", "flour", "oven", "yeast", "dough"],
+]
+
+def make_segments(segments_per_topic=40, seconds_per_segment=4):
+    """Build a synthetic transcript that changes topic every segments_per_topic segments"""
+    rng = random.Random(0)
+    segments = []
+    for words in TOPICS:
+        for _ in range(segments_per_topic):
+            start = len(segments) * seconds_per_segment
+            text = " ".join(rng.choice(words + ["the", "and", "a", "is"]) for _ in range(10))
+            segments.append({'start': start, 'end': start + seconds_per_segment, 'text': text})
+    return segments
+
+class DepthScoreTests(unittest.TestCase):
+    def test_depth_is_measured_from_nearest_peaks(self):
+        similarity = np.array([1.0, 0.2, 0.6, 0.5, 0.6, 0.2, 1.0])
+        depth = pipeline._depth_scores(similarity)
+        
+        # Real valleys climb to the 1.0 peaks on one side and 0.6 on the other
+        self.assertAlmostEqual(depth[1], 1.2)
+        self.assertAlmostEqual(depth[5], 1.2)
+        # The shallow dip between the two 0.6 peaks stays shallow, even though
+        # the most similar gaps in the transcript are much higher
+        self.assertAlmostEqual(depth[3], 0.2)
+        self.assertAlmostEqual(depth[2], 0.0)
+
+class GenerateChaptersTests(unittest.TestCase):
+    def test_chapters_start_at_topic_changes(self):
+        chapters = pipeline.generate_chapters(make_segments(), max_chapters=4)
+        
+        self.assertEqual([chapter['start_time'] for chapter in chapters], [0, 160, 320, 480])
+        self.assertEqual(chapters[-1]['end_time'], 640)
+        for chapter, words in zip(chapters, TOPICS):
+            self.assertTrue(any(word in chapter['title'] for word in words))
+
+    def test_short_transcript_splits_by_time(self):
+        segments = make_segments(segments_per_topic=2)
+        chapters = pipeline.generate_chapters(segments, max_chapters=4)
+        
+        self.assertEqual(len(chapters), 4)
+        self.assertEqual(chapters[-1]['end_time'], segments[-1]['end'])
+
+    def test_flat_similarity_splits_by_time(self):
+        # Identical segments (e.g. repeated text on music) have no topic shifts
+        segments = [{'start': i * 4, 'end': i * 4 + 4, 'text': "la la la la"} for i in range(200)]
+        chapters = pipeline.generate_chapters(segments)
+        
+        self.assertEqual(len(chapters), 8)
+        self.assertEqual(chapters[-1]['end_time'], segments[-1]['end'])
+
+if __name__ == '__main__':
+    unittest.main()
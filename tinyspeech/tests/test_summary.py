@@ -0,0 +1,105 @@
+# TinySpeech Summarizer - Gemini response parsing tests
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pipeline
+
+RESPONSE = """## Summary
+The talk covers pets and markets.
+
+## Key Points
+- Pets need vets
+
+## Main Topics
+- Pets
+
+## Chapter Titles
+1. Caring for Pets
+2) How Markets Move
+"""
+
+class ParseSummaryResponseTests(unittest.TestCase):
+    def test_splits_summary_and_chapter_titles(self):
+        summary, chapter_titles = pipeline.parse_summary_response(RESPONSE)
+        
+        self.assertTrue(summary.startswith("## Summary\nThe talk covers pets and markets."))
+        self.assertTrue(summary.endswith("- Pets\n"))
+        self.assertNotIn("Chapter Titles", summary)
+        self.assertEqual(chapter_titles, ["Caring for Pets", "How Markets Move"])
+
+class PartialSummaryTests(unittest.TestCase):
+    def test_shows_complete_lines_of_the_summary_first(self):
+        self.assertEqual(pipeline._partial_summary("## Summ"), "")
+        self.assertEqual(pipeline._partial_summary("## Summary\nThe talk co"), "## Summary")
+    
+    def test_holds_back_the_chapter_titles_section(self):
+        cut = RESPONSE.index("## Chapter Titles") + len("## Chap")
+        expected = RESPONSE[:RESPONSE.index("## Chapter Titles")].strip()
+        self.assertEqual(pipeline._partial_summary(RESPONSE[:cut]), expected)
+        self.assertEqual(pipeline._partial_summary(RESPONSE), expected)
+
+CHAPTERS = [
+    {'start_time': 0, 'end_time': 60, 'text': "pets and vets"},
+    {'start_time': 60, 'end_time': 120, 'text': "stocks and bonds"},
+]
+
+class Chunk:
+    """Stand-in for a streamed Gemini response chunk"""
+    def __init__(self, text=None, finish_reason='FINISH_REASON_UNSPECIFIED'):
+        self._text = text
+        reason = types.SimpleNamespace(name=finish_reason)
+        self.candidates = [types.SimpleNamespace(finish_reason=reason)]
+    
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("no text parts")
+        return self._text
+
+def stub_gemini(chunks):
+    """Return a stand-in for the configured google.generativeai module"""
+    model = mock.Mock()
+    model.generate_content.return_value = chunks
+    return types.SimpleNamespace(GenerativeModel=lambda *args, **kwargs: model)
+
+class StreamSummaryTests(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(pipeline, 'CACHE_DIR', self.cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+    
+    def summarize(self, chunks):
+        with mock.patch.object(pipeline, '_configure_gemini', return_value=stub_gemini(chunks)):
+            return pipeline.generate_summary("transcript", CHAPTERS)
+    
+    def test_complete_response_is_cached(self):
+        summary, chapter_titles = self.summarize([Chunk(RESPONSE[:40]), Chunk(RESPONSE[40:]), Chunk(finish_reason='STOP')])
+        
+        self.assertEqual(chapter_titles, ["Caring for Pets", "How Markets Move"])
+        self.assertEqual(self.summarize([]), (summary, chapter_titles))
+    
+    def test_response_cut_off_by_safety_fails_and_is_not_cached(self):
+        summary, chapter_titles = self.summarize([Chunk("## Summary\nPartial sum"), Chunk(finish_reason='SAFETY')])
+        
+        self.assertIn("Summary generation failed", summary)
+        self.assertEqual(chapter_titles, [])
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+    
+    def test_response_with_missing_titles_is_not_cached(self):
+        response = RESPONSE[:RESPONSE.index("2)")]
+        summary, chapter_titles = self.summarize([Chunk(response), Chunk(finish_reason='STOP')])
+        
+        self.assertIn("## Summary", summary)
+        self.assertEqual(chapter_titles, [])
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+
+if __name__ == '__main__':
+    unittest.main()